@@ -1,16 +1,24 @@
 # App.py
+import atexit
+import json
+import logging
 import os
+import queue
+import random
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from datetime import date, datetime, timedelta
 from flask import (
     Flask, render_template, request, redirect, url_for,
     request as flask_request, session, flash, jsonify
 )
 from zoneinfo import ZoneInfo
-from collections import defaultdict, deque, OrderedDict
+from collections import defaultdict, OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
 
 # ---- GOOGLE SHEETS IMPORTS ----
-import traceback
 import gspread
 from gspread import exceptions as gsex
 from google.oauth2.service_account import Credentials
@@ -24,14 +32,54 @@ DB_PATH = os.getenv("DB_PATH", "clock.db")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "").strip()
 app.secret_key = os.getenv("SECRET_KEY", "dev-insecure").encode()
 
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+log = logging.getLogger("crew_clock")
+
 try:
     TZ = ZoneInfo(os.getenv("TZ", "America/New_York"))
 except Exception:
     TZ = datetime.now().astimezone().tzinfo
 
+def _fmt_ts(dt: datetime) -> str:
+    # Same "%Y-%m-%d %H:%M:%S" text as strftime; [:19] drops the UTC offset.
+    return dt.isoformat(sep=" ", timespec="seconds")[:19]
+
 # ------------------------------------------------------------------
 # DB Init
 # ------------------------------------------------------------------
+def _rebuild_daily_totals(conn):
+    # Pair each IN with the crew's next punch and total the closed shifts
+    # per IN day.
+    conn.execute("DELETE FROM daily_totals")
+    conn.execute("""
+        INSERT INTO daily_totals (crew, day, hours)
+        WITH paired AS (
+            SELECT crew, action, ts_epoch, ts_date,
+                   LEAD(action)   OVER w AS next_action,
+                   LEAD(ts_epoch) OVER w AS next_epoch
+            FROM entries
+            WINDOW w AS (PARTITION BY crew ORDER BY ts, id)
+        )
+        SELECT crew, ts_date, SUM(next_epoch - ts_epoch) / 3600.0
+        FROM paired
+        WHERE action = 'IN' AND next_action = 'OUT'
+        GROUP BY crew, ts_date
+    """)
+
+def _rebuild_open_ins(conn):
+    # A crew is clocked in when its latest punch is an IN, in the same (ts, id)
+    # order _rebuild_daily_totals pairs by.
+    conn.execute("DELETE FROM open_ins")
+    conn.execute("""
+        INSERT INTO open_ins (crew, ts, ts_epoch)
+        SELECT crew, ts, ts_epoch FROM (
+            SELECT crew, action, ts, ts_epoch,
+                   ROW_NUMBER() OVER (PARTITION BY crew ORDER BY ts DESC, id DESC) AS rn
+            FROM entries
+        )
+        WHERE rn = 1 AND action = 'IN'
+    """)
+
 def init_db():
     os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
     with sqlite3.connect(DB_PATH) as conn:
@@ -43,221 +91,809 @@ def init_db():
                 ts TEXT NOT NULL
             )
         """)
+        has_totals = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='daily_totals'"
+        ).fetchone()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS daily_totals (
+                crew TEXT NOT NULL,
+                day TEXT NOT NULL,
+                hours REAL NOT NULL,
+                PRIMARY KEY (crew, day)
+            )
+        """)
+        has_open_ins = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='open_ins'"
+        ).fetchone()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS open_ins (
+                crew TEXT PRIMARY KEY,
+                ts TEXT NOT NULL,
+                ts_epoch INTEGER NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sheet_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_try REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sheet_leases (
+                name TEXT PRIMARY KEY,
+                holder TEXT NOT NULL,
+                expires REAL NOT NULL
+            )
+        """)
+        cols = {r[1] for r in conn.execute("PRAGMA table_info(entries)")}
+        if "ts_epoch" not in cols:
+            conn.execute("ALTER TABLE entries ADD COLUMN ts_epoch INTEGER")
+        if "ts_date" not in cols:
+            conn.execute("ALTER TABLE entries ADD COLUMN ts_date TEXT")
+        missing = conn.execute(
+            "SELECT id, ts FROM entries WHERE ts_epoch IS NULL OR ts_date IS NULL"
+        ).fetchall()
+        conn.executemany(
+            "UPDATE entries SET ts_epoch=?, ts_date=? WHERE id=?",
+            [
+                (int(datetime.fromisoformat(ts).replace(tzinfo=TZ).timestamp()), ts[:10], row_id)
+                for row_id, ts in missing
+            ]
+        )
+        # Covers the per-crew pairing scan in _rebuild_daily_totals so the
+        # window query never has to visit the table itself.
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_entries_pairing "
+            "ON entries(crew, ts, id, action, ts_epoch, ts_date)"
+        )
+        if not has_totals:
+            _rebuild_daily_totals(conn)
+        if not has_open_ins:
+            _rebuild_open_ins(conn)
         conn.commit()
 init_db()
 
+DB_POOL_SIZE = 4
+DB_POOL_WAIT_SECS = 30  # same as the busy timeout
+
+def _connect():
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
+    return conn
+
+class _ConnPool:
+    # LIFO so the most recently used connection (warmest page cache) goes out first.
+    # Connections open lazily and belong to one process: a gunicorn worker forked
+    # from a preloaded master must not inherit the master's SQLite handles.
+    def __init__(self, size):
+        self._size = size
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._q = queue.LifoQueue()
+        self._opened = 0
+
+    def _get(self):
+        deadline = time.monotonic() + DB_POOL_WAIT_SECS
+        while True:
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset()
+                q = self._q
+                try:
+                    return q, q.get_nowait()
+                except queue.Empty:
+                    if self._opened < self._size:
+                        self._opened += 1
+                        return q, None
+            # Wake up now and then in case a failed open handed its slot back.
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise sqlite3.OperationalError("timed out waiting for a pooled SQLite connection")
+            try:
+                return q, q.get(timeout=min(remaining, 1.0))
+            except queue.Empty:
+                continue
+
+    def _release_slot(self, q):
+        with self._lock:
+            if q is self._q:
+                self._opened -= 1
+
+    @contextmanager
+    def acquire(self):
+        q, conn = self._get()
+        if conn is None:
+            try:
+                conn = _connect()
+            except Exception:
+                self._release_slot(q)
+                raise
+        try:
+            yield conn
+        finally:
+            try:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                # Broken connection: drop it and let the next caller open a fresh one.
+                conn.close()
+                self._release_slot(q)
+            else:
+                q.put(conn)
+
+_pool = _ConnPool(DB_POOL_SIZE)
+
 # ------------------------------------------------------------------
 # DB Helpers
 # ------------------------------------------------------------------
+def _recent_entries(conn, limit):
+    return conn.execute(
+        "SELECT id, crew, action, ts FROM entries ORDER BY id DESC LIMIT ?",
+        (limit,)
+    ).fetchall()
+
 def get_recent_entries(limit=50):
-    with sqlite3.connect(DB_PATH) as conn:
-        rows = conn.execute(
-            "SELECT id, crew, action, ts FROM entries ORDER BY id DESC LIMIT ?",
-            (limit,)
-        ).fetchall()
-    return rows
+    with _pool.acquire() as conn:
+        return _recent_entries(conn, limit)
 
-def insert_entry(crew, action, timestamp):
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.execute(
-            "INSERT INTO entries (crew, action, ts) VALUES (?, ?, ?)",
-            (crew, action, timestamp)
-        )
-        conn.commit()
+def insert_entry(crew, action, now_dt: datetime):
+    # Record a punch; an OUT returns (ts_in, hours) of the shift it closes, or None.
+    ts = _fmt_ts(now_dt)
+    epoch = int(now_dt.timestamp())
+    closed = worked = None
+    with _pool.acquire() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row_id = conn.execute(
+                "INSERT INTO entries (crew, action, ts, ts_epoch, ts_date) VALUES (?, ?, ?, ?, ?)",
+                (crew, action, ts, epoch, ts[:10])
+            ).lastrowid
+            if action == "IN":
+                conn.execute(
+                    "INSERT OR REPLACE INTO open_ins (crew, ts, ts_epoch) VALUES (?, ?, ?)",
+                    (crew, ts, epoch)
+                )
+            else:
+                open_in = conn.execute(
+                    "DELETE FROM open_ins WHERE crew=? RETURNING ts, ts_epoch", (crew,)
+                ).fetchone()
+                if open_in:
+                    closed = (open_in[0], (epoch - open_in[1]) / 3600.0)
+                    worked = (open_in[0][:10], closed[1])
+                    conn.execute(
+                        "INSERT INTO daily_totals (crew, day, hours) VALUES (?, ?, ?) "
+                        "ON CONFLICT(crew, day) DO UPDATE SET hours = hours + excluded.hours",
+                        (crew, *worked)
+                    )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    _note_daily_insert(row_id, crew, worked)
+    return closed
 
-def calculate_daily_hours():
-    with sqlite3.connect(DB_PATH) as conn:
-        rows = conn.execute(
-            "SELECT crew, action, ts FROM entries ORDER BY crew, ts"
-        ).fetchall()
-    open_in = defaultdict(deque)
-    totals = defaultdict(lambda: defaultdict(float))
-    for crew, action, ts in rows:
-        t = datetime.strptime(ts, "%Y-%m-%d %H:%M:%S").replace(tzinfo=TZ)
-        if action == "IN":
-            open_in[crew].append(t)
-        elif action == "OUT" and open_in[crew]:
-            t_in = open_in[crew].popleft()
-            key = t_in.date().strftime("%Y-%m-%d")
-            totals[crew][key] += (t - t_in).total_seconds() / 3600.0
-    return {crew: dict(days) for crew, days in totals.items()}
+def insert_entries_bulk(rows):
+    # Record many (crew, action, dt) punches in one transaction (imports, replays).
+    # dt must be aware; it is stored as TZ wall-clock time like live punches.
+    params = []
+    for crew, action, dt in rows:
+        if dt.tzinfo is None:
+            raise ValueError(f"naive datetime for {crew} {action}: {dt}")
+        dt = dt.astimezone(TZ)
+        ts = _fmt_ts(dt)
+        params.append((crew, action, ts, int(dt.timestamp()), ts[:10]))
+    totals_sql = "SELECT crew, day, hours FROM daily_totals"
+    with _pool.acquire() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = set(conn.execute(totals_sql))
+            conn.executemany(
+                "INSERT INTO entries (crew, action, ts, ts_epoch, ts_date) VALUES (?, ?, ?, ?, ?)",
+                params
+            )
+            # Imported punches can land anywhere in a crew's history, so re-pair
+            # everything rather than patching daily_totals row by row.
+            _rebuild_daily_totals(conn)
+            _rebuild_open_ins(conn)
+            changed = before ^ set(conn.execute(totals_sql))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    with _daily_cache_lock:
+        _daily_cache["id"] = -1
+    # Re-pairing can move hours in past weeks too; refresh each week that changed.
+    for day in {day for _, day, _ in changed}:
+        _schedule_rebuild(_week_title_for_date(*map(int, day.split("-"))))
+
+# Daily hours as of entries.id == "id"; the dicts are replaced, never mutated,
+# so a template can iterate a value while a writer moves the cache on.
+_daily_cache = {"id": -1, "val": {}}
+_daily_cache_lock = threading.Lock()
+
+def _note_daily_insert(row_id, crew, worked):
+    with _daily_cache_lock:
+        if _daily_cache["id"] != row_id - 1:
+            # Another worker wrote in between; recompute on the next read.
+            _daily_cache["id"] = -1
+            return
+        if worked:
+            day, hours = worked
+            val = dict(_daily_cache["val"])
+            days = val[crew] = dict(val.get(crew, {}))
+            days[day] = days.get(day, 0.0) + hours
+            _daily_cache["val"] = val
+        _daily_cache["id"] = row_id
+
+def _daily_hours(conn, max_id):
+    with _daily_cache_lock:
+        if max_id == _daily_cache["id"]:
+            return _daily_cache["val"]
+    totals = {}
+    per_crew = totals.setdefault
+    for crew, day, hours in conn.execute("SELECT crew, day, hours FROM daily_totals"):
+        per_crew(crew, {})[day] = hours
+    with _daily_cache_lock:
+        _daily_cache["id"], _daily_cache["val"] = max_id, totals
+    return totals
+
+def get_crew_hours_between(day_from, day_to):
+    # Hours per crew for shifts starting on days in [day_from, day_to).
+    with _pool.acquire() as conn:
+        return dict(conn.execute(
+            "SELECT crew, SUM(hours) FROM daily_totals WHERE day >= ? AND day < ? GROUP BY crew",
+            (day_from, day_to)
+        ))
+
+def get_homepage_data(limit=50):
+    # (recent_rows, daily_hours) read from one connection and one snapshot.
+    with _pool.acquire() as conn:
+        conn.execute("BEGIN")
+        try:
+            rows = _recent_entries(conn, limit)
+            # Rows come newest first, so the first id doubles as MAX(id).
+            daily = _daily_hours(conn, rows[0][0] if rows else 0)
+        finally:
+            conn.execute("COMMIT")
+    return rows, daily
 
 # ------------------------------------------------------------------
 # Google Sheets Helpers (same as before)
 # ------------------------------------------------------------------
+SHEETS_MAX_ATTEMPTS = 6
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+def _with_backoff(fn, *args, **kwargs):
+    # Absorb rate limits and transient 5xx with jittered exponential backoff.
+    for attempt in range(SHEETS_MAX_ATTEMPTS):
+        try:
+            return fn(*args, **kwargs)
+        except gsex.APIError as e:
+            if e.response.status_code not in RETRYABLE_STATUS or attempt == SHEETS_MAX_ATTEMPTS - 1:
+                raise
+            time.sleep(min(2 ** attempt, 64) + random.random())
+
+GS_CACHE_TTL = 3000  # seconds; service-account tokens live for an hour
+WS_CACHE_TTL = float(os.getenv("WS_CACHE_TTL", "600"))  # re-list tabs to catch edits made in the Sheets UI
+_gs_lock = threading.Lock()
+_ws_create_lock = threading.Lock()
+_gs_cache = {"gc": None, "t": 0.0}
+_sh_cache = {}  # sheet_id -> Spreadsheet
+_ws_cache = {}  # (sheet_id, title) -> Worksheet
+_ws_loaded = {}  # sheet_id -> when its worksheet list was fetched
+
+def _reset_gs_cache():
+    with _gs_lock:
+        _gs_cache.update(gc=None, t=0.0)
+        _sh_cache.clear()
+        _ws_cache.clear()
+        _ws_loaded.clear()
+
 def _get_gs_client():
-    scopes = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    secret_path = "/etc/secrets/service_account.json"
-    if os.path.exists(secret_path):
-        creds = Credentials.from_service_account_file(secret_path, scopes=scopes)
-        return gspread.authorize(creds)
-    raise RuntimeError("No Google credentials found. Add Secret File on Render.")
+    with _gs_lock:
+        if _gs_cache["gc"] is not None and time.time() - _gs_cache["t"] < GS_CACHE_TTL:
+            return _gs_cache["gc"]
+        scopes = [
+            "https://www.googleapis.com/auth/spreadsheets",
+            "https://www.googleapis.com/auth/drive",
+        ]
+        secret_path = "/etc/secrets/service_account.json"
+        if os.path.exists(secret_path):
+            creds = Credentials.from_service_account_file(secret_path, scopes=scopes)
+            gc = gspread.authorize(creds)
+            _gs_cache.update(gc=gc, t=time.time())
+            _sh_cache.clear()
+            _ws_cache.clear()
+            _ws_loaded.clear()
+            return gc
+        raise RuntimeError("No Google credentials found. Add Secret File on Render.")
+
+def _get_sheet(sheet_id: str):
+    gc = _get_gs_client()
+    with _gs_lock:
+        sh = _sh_cache.get(sheet_id)
+    if sh is None:
+        # Opened outside the lock: backoff can sleep for a minute.
+        sh = _with_backoff(gc.open_by_key, sheet_id)
+        with _gs_lock:
+            sh = _sh_cache.setdefault(sheet_id, sh)
+    return sh
+
+def _check_api_error(e: gsex.APIError):
+    # 401: expired or revoked token, re-authorize on next use.
+    # 404: a cached worksheet was deleted out from under us.
+    status = e.response.status_code
+    if status == 401:
+        _reset_gs_cache()
+    elif status == 404:
+        with _gs_lock:
+            _ws_cache.clear()
+            _ws_loaded.clear()
+
+def _api_error_detail(e: gsex.APIError):
+    # Always "APIError: [code]: ..." so _is_permanent_failure can read the code;
+    # the full JSON body is only worth decoding when someone is debugging.
+    if log.isEnabledFor(logging.DEBUG):
+        try:
+            return f"APIError: [{e.response.status_code}]: {e.response.json()}"
+        except Exception:
+            pass
+    return str(e)  # gspread formats this as "APIError: [code]: message"
+
+@lru_cache(maxsize=256)
+def _week_title_cached(year: int, week: int) -> str:
+    return f"Week {year}-{week:02d}"
+
+@lru_cache(maxsize=64)
+def _week_title_for_date(y: int, m: int, d: int) -> str:
+    # Every punch on a given day shares a title, so isocalendar() runs once a day.
+    iso = date(y, m, d).isocalendar()
+    return _week_title_cached(iso[0], iso[1])
+
+_cur_week = {"span": None}  # (monday_start, next_monday_start, title) in TZ
 
 def _week_title(dt: datetime) -> str:
-    iso = dt.isocalendar()
-    return f"Week {iso.year}-{iso.week:02d}"
+    # Nearly every punch lands in the current week: two comparisons, no calendar math.
+    span = _cur_week["span"]
+    if span and dt.tzinfo is TZ and span[0] <= dt < span[1]:
+        return span[2]
+    title = _week_title_for_date(dt.year, dt.month, dt.day)
+    if dt.tzinfo is TZ:
+        monday = date(dt.year, dt.month, dt.day) - timedelta(days=dt.weekday())
+        start = datetime(monday.year, monday.month, monday.day, tzinfo=TZ)
+        _cur_week["span"] = (start, start + timedelta(days=7), title)
+    return title
 
-def _get_or_create_week_ws(sh, week_title: str):
-    for ws in sh.worksheets():
-        if ws.title == week_title:
+def _get_or_create_ws(sh, title: str, rows: int, cols: int, header=None):
+    # _gs_lock guards the caches only; every network call runs outside it.
+    key = (sh.id, title)
+    with _gs_lock:
+        loaded = _ws_loaded.get(sh.id)
+        if loaded is not None and time.time() - loaded > WS_CACHE_TTL:
+            for k in [k for k in _ws_cache if k[0] == sh.id]:
+                del _ws_cache[k]
+            del _ws_loaded[sh.id]
+        ws = _ws_cache.get(key)
+        if ws is not None:
             return ws
-    ws = sh.add_worksheet(title=week_title, rows=1000, cols=8)
-    ws.update("A1:G1", [["date","crew","action","ts_in","ts_out","hours","source"]])
+        listed = sh.id in _ws_loaded
+    if not listed:
+        found = {(sh.id, w.title): w for w in _with_backoff(sh.worksheets)}
+        with _gs_lock:
+            _ws_cache.update(found)
+            _ws_loaded[sh.id] = time.time()
+        ws = found.get(key)
+    if ws is None:
+        # Rare, so one lock for all creations keeps two threads from both
+        # calling add_worksheet for the same title.
+        with _ws_create_lock:
+            with _gs_lock:
+                ws = _ws_cache.get(key)
+            if ws is None:
+                # Another worker may have created it since we listed the sheets.
+                try:
+                    ws = sh.worksheet(title)
+                except gsex.WorksheetNotFound:
+                    ws = sh.add_worksheet(title=title, rows=rows, cols=cols)
+                    if header:
+                        ws.update(f"A1:{chr(ord('A') + len(header) - 1)}1", [header])
+                with _gs_lock:
+                    _ws_cache[key] = ws
     return ws
 
+def _get_or_create_week_ws(sh, week_title: str):
+    return _get_or_create_ws(sh, week_title, 1000, 8,
+                             ["date","crew","action","ts_in","ts_out","hours","source"])
+
 def _get_or_create_totals_ws(sh, week_title: str):
-    title = f"Totals {week_title}"
-    for ws in sh.worksheets():
-        if ws.title == title:
-            return ws
-    ws = sh.add_worksheet(title=title, rows=200, cols=4)
-    ws.update("A1:C1", [["crew","total_hours","updated_at"]])
-    return ws
+    return _get_or_create_ws(sh, f"Totals {week_title}", 200, 4,
+                             ["crew","total_hours","updated_at"])
 
 def _get_or_create_all_weeks_ws(sh):
-    title = "All Weeks Summary"
-    for ws in sh.worksheets():
-        if ws.title == title:
-            return ws
-    ws = sh.add_worksheet(title=title, rows=5000, cols=4)
-    ws.update("A1:D1", [["week_title","crew","total_hours","updated_at"]])
-    return ws
+    return _get_or_create_ws(sh, "All Weeks Summary", 5000, 4,
+                             ["week_title","crew","total_hours","updated_at"])
 
-def _find_open_in_ts(crew: str):
-    with sqlite3.connect(DB_PATH) as conn:
-        rows = conn.execute(
-            "SELECT action, ts FROM entries WHERE crew=? ORDER BY ts ASC, id ASC",
-            (crew,)
-        ).fetchall()
-    stack = []
-    for action, ts in rows:
-        if action == "IN":
-            stack.append(ts)
-        elif action == "OUT" and stack:
-            stack.pop()
-    return stack[-1] if stack else None
-
-def log_week_row(date_str, crew, action, ts_in, ts_out, hours):
+def _week_totals(week_title: str):
+    # Totals come from daily_totals in SQLite rather than reading the week tab back.
+    year, week = week_title.rsplit(" ", 1)[1].split("-")
+    monday = date.fromisocalendar(int(year), int(week), 1)
+    return get_crew_hours_between(monday.isoformat(), (monday + timedelta(days=7)).isoformat())
+
+def _week_row(date_str, crew, action, ts_in, ts_out, hours):
+    return [date_str, crew, action, ts_in or "", ts_out or "", hours if hours is not None else "", "crew-clock"]
+
+def append_week_rows(week_title: str, rows: list):
     try:
         sheet_id = os.getenv("SHEET_ID", "").strip()
         if not sheet_id:
             return False, "Missing SHEET_ID"
-        gc = _get_gs_client()
-        sh = gc.open_by_key(sheet_id)
-        dt = datetime.strptime(date_str, "%Y-%m-%d")
-        week_title = _week_title(dt)
+        sh = _get_sheet(sheet_id)
         ws = _get_or_create_week_ws(sh, week_title)
-        ws.append_row(
-            [date_str, crew, action, ts_in or "", ts_out or "", hours if hours is not None else "", "crew-clock"],
+        _with_backoff(
+            ws.append_rows,
+            rows,
             value_input_option="RAW",
             insert_data_option="INSERT_ROWS",
+            table_range="A1",
         )
         return True, None
     except gsex.APIError as e:
-        try:
-            err_json = e.response.json()
-        except Exception:
-            err_json = str(e)
-        traceback.print_exc()
-        return False, f"APIError: {err_json}"
+        _check_api_error(e)
+        return False, _api_error_detail(e)
     except Exception as e:
-        traceback.print_exc()
+        # Callers report the error; keep the traceback for debugging only.
+        log.debug("Sheets append failed", exc_info=True)
         return False, f"{type(e).__name__}: {str(e)}"
 
-from collections import OrderedDict as _OD
-def update_all_weeks_summary(sh, week_title: str, ordered_totals: _OD, updated_at: str):
+def log_week_row(now_dt: datetime, crew, action, ts_in, ts_out, hours):
+    date_str = _fmt_ts(now_dt)[:10]
+    return append_week_rows(_week_title(now_dt), [_week_row(date_str, crew, action, ts_in, ts_out, hours)])
+
+def _row_data(rows: list) -> list:
+    def cell(v):
+        if isinstance(v, (int, float)):
+            return {"userEnteredValue": {"numberValue": v}}
+        return {"userEnteredValue": {"stringValue": str(v)}}
+    return [{"values": [cell(v) for v in row]} for row in rows]
+
+def _row_runs(indices: list) -> list:
+    # [3, 4, 5, 9] -> [(3, 6), (9, 10)] as half-open row ranges.
+    runs = []
+    for i in indices:
+        if runs and runs[-1][1] == i:
+            runs[-1][1] = i + 1
+        else:
+            runs.append([i, i + 1])
+    return [tuple(r) for r in runs]
+
+SUMMARY_LEASE_SECS = 300  # outlives the backoff of one read plus one batch_update
+SUMMARY_LEASE_WAIT_SECS = float(os.getenv("SUMMARY_LEASE_WAIT_SECS", "15"))  # kept below REBUILD_WAIT_SECS
+
+@contextmanager
+def _summary_lease():
+    # The summary rewrite uses row numbers from a fresh read, so two gunicorn
+    # workers interleaving read and write would delete each other's rows.
+    # A lease row in clock.db serializes them; an expired lease is taken over.
+    holder = f"{os.getpid()}:{threading.get_ident()}"
+    deadline = time.monotonic() + SUMMARY_LEASE_WAIT_SECS
+    while True:
+        now = time.time()
+        with _pool.acquire() as conn:
+            got = conn.execute("""
+                INSERT INTO sheet_leases (name, holder, expires) VALUES ('summary', ?, ?)
+                ON CONFLICT(name) DO UPDATE SET holder=excluded.holder, expires=excluded.expires
+                WHERE sheet_leases.expires < ?
+            """, (holder, now + SUMMARY_LEASE_SECS, now)).rowcount
+        if got:
+            break
+        if time.monotonic() >= deadline:
+            raise TimeoutError("All Weeks summary is busy in another worker")
+        time.sleep(0.5)
+    try:
+        yield
+    finally:
+        with _pool.acquire() as conn:
+            conn.execute("DELETE FROM sheet_leases WHERE name='summary' AND holder=?", (holder,))
+
+def _build_all_weeks_summary(sh, week_title: str, ordered_totals: OrderedDict, updated_at: str):
+    # Column A is re-read on every rebuild: people editing the sheet move rows
+    # around, so cached positions can't be trusted. Call under _summary_lease().
     ws = _get_or_create_all_weeks_ws(sh)
-    values = ws.get_all_values()
-    rows = [["week_title","crew","total_hours","updated_at"]]
-    if values and len(values) > 1:
-        header = values[0]
-        idx = {name: i for i, name in enumerate(header)}
-        for row in values[1:]:
-            if len(row) < 2: continue
-            if row[0] != week_title:
-                rows.append([
-                    row[idx.get("week_title",0)],
-                    row[idx.get("crew",1)],
-                    row[idx.get("total_hours",2)],
-                    row[idx.get("updated_at",3)],
-                ])
+    col_a = _with_backoff(sh.values_get, f"'{ws.title}'!A:A").get("values", [])
+    old = [i for i, r in enumerate(col_a) if i and r and r[0] == week_title]
+    rows = []
     for crew, hrs in ordered_totals.items():
         rows.append([week_title, crew, round(hrs,2), updated_at])
     if ordered_totals:
         grand = round(sum(ordered_totals.values()),2)
         rows.append([week_title, "__WEEK_TOTAL__", grand, updated_at])
-    ws.clear()
-    ws.update(f"A1:D{len(rows)}", rows)
+
+    if rows and len(old) == len(rows) and old[-1] - old[0] == len(rows) - 1:
+        # Same crews as last time: overwrite the block in place.
+        return [{"updateCells": {
+            "range": {"sheetId": ws.id, "startRowIndex": old[0], "endRowIndex": old[0] + len(rows),
+                      "startColumnIndex": 0, "endColumnIndex": 4},
+            "rows": _row_data(rows),
+            "fields": "userEnteredValue",
+        }}]
+
+    # Otherwise delete this week's old rows and append the fresh block,
+    # leaving every other week's rows untouched.
+    requests = [
+        {"deleteDimension": {"range": {
+            "sheetId": ws.id, "dimension": "ROWS", "startIndex": start, "endIndex": end,
+        }}}
+        for start, end in reversed(_row_runs(old))
+    ]
+    if rows:
+        requests.append({"appendCells": {
+            "sheetId": ws.id, "rows": _row_data(rows), "fields": "userEnteredValue",
+        }})
+    return requests
 
 def update_weekly_totals_for_week(week_title: str):
     try:
         sheet_id = os.getenv("SHEET_ID", "").strip()
         if not sheet_id:
             return False, "Missing SHEET_ID"
-        gc = _get_gs_client()
-        sh = gc.open_by_key(sheet_id)
-        week_ws = _get_or_create_week_ws(sh, week_title)
-        values = week_ws.get_all_values()
+        sh = _get_sheet(sheet_id)
         totals_ws = _get_or_create_totals_ws(sh, week_title)
+        totals = _week_totals(week_title)
 
-        if not values or len(values) < 2:
-            totals_ws.clear()
-            totals_ws.update("A1:C1", [["crew","total_hours","updated_at"]])
-            update_all_weeks_summary(sh, week_title, _OD(), datetime.now(TZ).strftime("%Y-%m-%d %H:%M:%S"))
-            return True, None
-
-        header = values[0]
-        idx = {name: i for i, name in enumerate(header)}
-        required = ["crew","action","hours"]
-        if not all(col in idx for col in required):
-            return False, f"Missing columns in {week_title}: need {required}, have {header}"
-
-        totals = defaultdict(float)
-        for row in values[1:]:
-            try:
-                action = row[idx["action"]].strip().upper()
-                if action != "OUT": continue
-                crew = row[idx["crew"]].strip()
-                hrs_str = row[idx["hours"]].strip()
-                if not hrs_str: continue
-                hrs = float(hrs_str)
-                totals[crew] += hrs
-            except Exception:
-                continue
-
-        ordered = _OD(sorted(totals.items(), key=lambda x: x[0].lower()))
-        now_str = datetime.now(TZ).strftime("%Y-%m-%d %H:%M:%S")
-        totals_ws.clear()
+        ordered = OrderedDict(sorted(totals.items(), key=lambda x: x[0].lower()))
+        now_str = _fmt_ts(datetime.now(TZ))
         rows = [["crew","total_hours","updated_at"]]
         for crew, hrs in ordered.items():
             rows.append([crew, round(hrs,2), now_str])
         if len(rows) > 1:
             grand = round(sum(v for v in totals.values()),2)
             rows.append(["__WEEK_TOTAL__", grand, now_str])
-        totals_ws.update(f"A1:C{len(rows)}", rows)
-        update_all_weeks_summary(sh, week_title, ordered, now_str)
+        # An open-ended updateCells range clears whatever the new rows don't cover.
+        with _summary_lease():
+            _with_backoff(sh.batch_update, {"requests": [
+                {"updateCells": {
+                    "range": {"sheetId": totals_ws.id, "startRowIndex": 0,
+                              "startColumnIndex": 0, "endColumnIndex": 3},
+                    "rows": _row_data(rows),
+                    "fields": "userEnteredValue",
+                }},
+                *_build_all_weeks_summary(sh, week_title, ordered, now_str),
+            ]})
         return True, None
     except gsex.APIError as e:
-        try:
-            err_json = e.response.json()
-        except Exception:
-            err_json = str(e)
-        traceback.print_exc()
-        return False, f"APIError: {err_json}"
+        _check_api_error(e)
+        return False, _api_error_detail(e)
     except Exception as e:
-        traceback.print_exc()
+        # Callers report the error; keep the traceback for debugging only.
+        log.debug("Sheets totals rebuild failed", exc_info=True)
         return False, f"{type(e).__name__}: {str(e)}"
 
+# ------------------------------------------------------------------
+# Background Sheets worker
+# ------------------------------------------------------------------
+SHEETS_FLUSH_SECS = float(os.getenv("SHEETS_FLUSH_SECS", "0.5"))  # max age of a buffered row
+SHEETS_FLUSH_ROWS = int(os.getenv("SHEETS_FLUSH_ROWS", "20"))  # rows buffered before flushing early
+OUTBOX_RETRY_SECS = 60
+OUTBOX_LEASE_SECS = 600  # a claimed job is retried elsewhere if not settled by then
+OUTBOX_MAX_ATTEMPTS = 10  # ~8h of retries at the 1h cap before a job is dropped
+NON_RETRYABLE_STATUS = {400, 403}  # bad request / no access: retrying won't help
+SHEETS_SHUTDOWN_SECS = 10
+REBUILD_WAIT_SECS = 20  # manual rebuild wait; must stay under gunicorn's 30s worker timeout
+REBUILD_DEBOUNCE_SECS = float(os.getenv("REBUILD_DEBOUNCE_SECS", "30"))
+_sheets_q = queue.Queue()
+_pending_append = defaultdict(list)  # week_title -> rows; worker thread only
+_pending_rebuild = {}
+_pending_rebuild_lock = threading.Lock()
+
+def _job_payload(job):
+    return json.dumps({k: v for k, v in job.items() if k not in ("attempts", "outbox_id")})
+
+def _outbox_put(job):
+    # Park a job that failed even after backoff; _outbox_worker requeues it.
+    # A replayed job already owns a row, so that row is rescheduled in place.
+    attempts = job.get("attempts", 0) + 1
+    if attempts > OUTBOX_MAX_ATTEMPTS:
+        log.error("Dropping Sheets job after %d attempts: %s", attempts - 1, _job_payload(job))
+        _outbox_done(job)
+        return
+    next_try = time.time() + min(OUTBOX_RETRY_SECS * 2 ** attempts, 3600)
+    with _pool.acquire() as conn:
+        if "outbox_id" in job:
+            conn.execute(
+                "UPDATE sheet_outbox SET attempts=?, next_try=? WHERE id=?",
+                (attempts, next_try, job["outbox_id"])
+            )
+        else:
+            conn.execute(
+                "INSERT INTO sheet_outbox (payload, attempts, next_try) VALUES (?, ?, ?)",
+                (_job_payload(job), attempts, next_try)
+            )
+
+def _outbox_done(job):
+    if "outbox_id" in job:
+        with _pool.acquire() as conn:
+            conn.execute("DELETE FROM sheet_outbox WHERE id=?", (job["outbox_id"],))
+
+def _is_permanent_failure(err: str):
+    return err == "Missing SHEET_ID" or any(
+        err.startswith(f"APIError: [{status}]") for status in NON_RETRYABLE_STATUS
+    )
+
+def _run_or_outbox(job, fn, *args):
+    ok, err = fn(*args)
+    if ok:
+        _outbox_done(job)
+        return
+    log.warning("Sheets %s job for %s failed: %s", job["kind"], job.get("week_title"), err)
+    if err == "Missing SHEET_ID" and "outbox_id" not in job:
+        return
+    if _is_permanent_failure(err):
+        log.error("Dropping Sheets job, error is not retryable: %s", _job_payload(job))
+        _outbox_done(job)
+    else:
+        _outbox_put(job)
+
+def _flush_appends():
+    while _pending_append:
+        week_title, rows = _pending_append.popitem()
+        job = {"kind": "row", "week_title": week_title, "rows": rows}
+        _run_or_outbox(job, append_week_rows, week_title, rows)
+
+def _handle_sheets_job(job):
+    if job["kind"] == "row":
+        if "attempts" in job:
+            # Replayed from the outbox: send as its own batch so a further
+            # failure keeps counting attempts instead of starting over.
+            _run_or_outbox(job, append_week_rows, job["week_title"], job["rows"])
+        else:
+            _pending_append[job["week_title"]].extend(job["rows"])
+    elif job["kind"] == "flush":
+        try:
+            _flush_appends()
+        finally:
+            job["done"].set()
+    elif "done" in job:
+        # A manual rebuild: the caller reports the error, so no outbox.
+        try:
+            _flush_appends()
+            job["result"] = update_weekly_totals_for_week(job["week_title"])
+        finally:
+            job["done"].set()
+    else:
+        # Land buffered rows first so the week tab never trails its totals.
+        _flush_appends()
+        _run_or_outbox(job, update_weekly_totals_for_week, job["week_title"])
+
+def _rebuild_now(week_title: str):
+    # Manual rebuilds run on the worker as well, so in this process they queue
+    # behind debounced ones; _summary_lease covers the other workers.
+    # Returns (ok, err), or None if the job is still queued when the wait runs out.
+    job = {"kind": "totals", "week_title": week_title, "done": threading.Event()}
+    _ensure_sheets_threads()
+    _sheets_q.put(job)
+    if not job["done"].wait(REBUILD_WAIT_SECS):
+        return None
+    return job.get("result") or (False, "Sheets worker error; see logs")
+
+def _sheets_worker():
+    oldest = None  # monotonic time the oldest buffered row arrived
+    while True:
+        timeout = None if oldest is None else max(0.0, oldest + SHEETS_FLUSH_SECS - time.monotonic())
+        try:
+            job = _sheets_q.get(timeout=timeout)
+        except queue.Empty:
+            job = None
+        try:
+            if job is not None:
+                _handle_sheets_job(job)
+            if not _pending_append:
+                oldest = None
+                continue
+            if oldest is None:
+                oldest = time.monotonic()
+            buffered = sum(len(rows) for rows in _pending_append.values())
+            if buffered >= SHEETS_FLUSH_ROWS or time.monotonic() - oldest >= SHEETS_FLUSH_SECS:
+                _flush_appends()
+                oldest = None
+        except Exception:
+            log.exception("Sheets worker error")
+        finally:
+            if job is not None:
+                _sheets_q.task_done()
+
+def _fire_rebuild(week_title: str, timer):
+    with _pending_rebuild_lock:
+        # A newer timer may already have replaced us; leave that one tracked.
+        if _pending_rebuild.get(week_title) is timer:
+            del _pending_rebuild[week_title]
+    _sheets_q.put({"kind": "totals", "week_title": week_title})
+
+def _schedule_rebuild(week_title: str):
+    # Restart the timer on every OUT so a burst of punches costs one rebuild.
+    _ensure_sheets_threads()
+    with _pending_rebuild_lock:
+        timer = _pending_rebuild.get(week_title)
+        if timer:
+            timer.cancel()
+        timer = threading.Timer(REBUILD_DEBOUNCE_SECS, _fire_rebuild)
+        timer.args = (week_title, timer)
+        timer.daemon = True
+        _pending_rebuild[week_title] = timer
+        timer.start()
+
+def _outbox_worker():
+    while True:
+        time.sleep(OUTBOX_RETRY_SECS)
+        try:
+            # Claim due jobs with a lease instead of deleting them: the row is only
+            # removed once the job succeeds, so a worker that dies mid-retry just
+            # lets the lease run out and another worker picks the job up.
+            now = time.time()
+            with _pool.acquire() as conn:
+                due = conn.execute(
+                    "UPDATE sheet_outbox SET next_try = ? WHERE next_try <= ? "
+                    "RETURNING id, payload, attempts",
+                    (now + OUTBOX_LEASE_SECS, now)
+                ).fetchall()
+            for outbox_id, payload, attempts in due:
+                _sheets_q.put({**json.loads(payload), "attempts": attempts, "outbox_id": outbox_id})
+        except Exception:
+            log.exception("Sheets outbox error")
+
+def _shutdown_sheets():
+    # The worker is a daemon thread, so on exit (e.g. a gunicorn worker
+    # restart) hand it any debounced rebuilds plus a final flush and wait
+    # briefly instead of dropping buffered rows.
+    if _threads_pid != os.getpid():
+        return  # nothing was queued in this process (e.g. a preloading master)
+    with _pending_rebuild_lock:
+        timers = list(_pending_rebuild.items())
+        _pending_rebuild.clear()
+    for week_title, timer in timers:
+        timer.cancel()
+        _sheets_q.put({"kind": "totals", "week_title": week_title})
+    done = threading.Event()
+    _sheets_q.put({"kind": "flush", "done": done})
+    done.wait(SHEETS_SHUTDOWN_SECS)
+
+_threads_pid = None
+_threads_lock = threading.Lock()
+
+def _ensure_sheets_threads():
+    # Threads don't survive fork, so each process starts its own on first use
+    # instead of at import (which would run them in a preloading master only).
+    global _threads_pid
+    if _threads_pid == os.getpid():
+        return
+    with _threads_lock:
+        if _threads_pid == os.getpid():
+            return
+        threading.Thread(target=_sheets_worker, name="sheets-worker", daemon=True).start()
+        threading.Thread(target=_outbox_worker, name="sheets-outbox", daemon=True).start()
+        _threads_pid = os.getpid()
+
+atexit.register(_shutdown_sheets)
+
 # ------------------------------------------------------------------
 # Public routes (unchanged)
 # ------------------------------------------------------------------
+@app.before_request
+def _start_sheets_threads():
+    # Also replays any outbox left by a previous process once traffic arrives.
+    _ensure_sheets_threads()
+
 @app.route("/", methods=["GET"])
 def clock_page():
-    rows = get_recent_entries()
-    daily_hours = calculate_daily_hours()
+    rows, daily_hours = get_homepage_data()
     return render_template("clock.html", punches=rows, daily_hours_str=daily_hours)
 
 @app.route("/clock", methods=["POST"])
@@ -267,32 +903,31 @@ def clock_submit():
     if not crew or action not in {"IN","OUT"}:
         return redirect(url_for("clock_page"))
     now_dt = datetime.now(TZ)
-    date_str = now_dt.strftime("%Y-%m-%d")
-    ts_str = now_dt.strftime("%Y-%m-%d %H:%M:%S")
+    ts_str = _fmt_ts(now_dt)
+    date_str = ts_str[:10]
 
     ts_in_val = ts_out_val = None
     hours_val = None
-    if action == "OUT":
-        open_in_ts = _find_open_in_ts(crew)
-        if open_in_ts:
-            ts_in_val = open_in_ts
-            ts_out_val = ts_str
-            t_in = datetime.strptime(open_in_ts, "%Y-%m-%d %H:%M:%S").replace(tzinfo=TZ)
-            t_out = now_dt
-            hours_val = round((t_out - t_in).total_seconds() / 3600.0, 2)
-
-    insert_entry(crew, action, ts_str)
+    closed = insert_entry(crew, action, now_dt)
+    if closed:
+        ts_in_val, worked_hours = closed
+        ts_out_val = ts_str
+        hours_val = round(worked_hours, 2)
 
+    week_title = _week_title(now_dt)
     if action == "IN":
-        ok, err = log_week_row(date_str, crew, action, ts_in=ts_str, ts_out=None, hours=None)
+        row = _week_row(date_str, crew, action, ts_str, None, None)
     else:
-        ok, err = log_week_row(date_str, crew, action, ts_in=ts_in_val, ts_out=ts_out_val, hours=hours_val)
-        week_title = _week_title(now_dt)
-        ok2, err2 = update_weekly_totals_for_week(week_title)
-        if not ok2:
-            print("Totals update failed:", err2)
-    if not ok:
-        print("Sheets logging failed:", err)
+        row = _week_row(date_str, crew, action, ts_in_val, ts_out_val, hours_val)
+    _sheets_q.put({"kind": "row", "week_title": week_title, "rows": [row]})
+    if action == "OUT":
+        _schedule_rebuild(week_title)
+        if closed:
+            # Totals credit the IN day, so a shift across Sunday midnight
+            # changes last week's totals as well.
+            in_week = _week_title_for_date(*map(int, ts_in_val[:10].split("-")))
+            if in_week != week_title:
+                _schedule_rebuild(in_week)
     return redirect(url_for("clock_page"))
 
 # ------------------------------------------------------------------
@@ -300,22 +935,23 @@ def clock_submit():
 # ------------------------------------------------------------------
 @app.route("/health")
 def health():
+    # Liveness only; probes hit this constantly, so keep SQLite out of it.
+    return {"ok": True}, 200
+
+@app.route("/healthz")
+def healthz():
     try:
         _ = get_recent_entries(1)
         return {"ok": True}, 200
     except Exception as e:
         return {"ok": False, "error": str(e)}, 500
 
-@app.route("/healthz")
-def healthz():
-    return health()
-
 @app.route("/gs-test", methods=["GET"])
 def gs_test():
     now_dt = datetime.now(TZ)
-    date_str = now_dt.strftime("%Y-%m-%d")
-    ts_str = now_dt.strftime("%Y-%m-%d %H:%M:%S")
-    ok, err = log_week_row(date_str, "TEST", "PING", ts_in=ts_str, ts_out=None, hours=None)
+    ts_str = _fmt_ts(now_dt)
+    date_str = ts_str[:10]
+    ok, err = log_week_row(now_dt, "TEST", "PING", ts_in=ts_str, ts_out=None, hours=None)
     if ok:
         return {"ok": True, "wrote": [date_str, "TEST", "PING"]}, 200
     else:
@@ -327,24 +963,26 @@ def gs_debug():
     try:
         sheet_id = os.getenv("SHEET_ID", "").strip()
         out["SHEET_ID_present"] = bool(sheet_id)
-        gc = _get_gs_client()
+        _get_gs_client()
         out["auth"] = "ok"
-        sh = gc.open_by_key(sheet_id)
+        sh = _get_sheet(sheet_id)
         out["spreadsheet_title"] = sh.title
         out["worksheets"] = [ws.title for ws in sh.worksheets()]
         now_dt = datetime.now(TZ)
-        date_str = now_dt.strftime("%Y-%m-%d")
-        ts_str = now_dt.strftime("%Y-%m-%d %H:%M:%S")
+        ts_str = _fmt_ts(now_dt)
+        date_str = ts_str[:10]
         week_title = _week_title(now_dt)
         ws = _get_or_create_week_ws(sh, week_title)
-        ws.append_row([date_str, "DEBUG", "PING", ts_str, "", "", "crew-clock"],
+        ws.append_row(_week_row(date_str, "DEBUG", "PING", ts_str, None, None),
                       value_input_option="RAW",
-                      insert_data_option="INSERT_ROWS")
+                      insert_data_option="INSERT_ROWS",
+                      table_range="A1")
         out["append"] = "ok"
         out["week_title"] = week_title
         out["row_written"] = [date_str, "DEBUG", "PING", ts_str]
         return out, 200
     except gsex.APIError as e:
+        _check_api_error(e)
         try:
             return {"ok": False, "where": "API", "error": e.response.json()}, 500
         except Exception:
@@ -358,10 +996,13 @@ def rebuild_totals():
         q = flask_request.args.get("week", "").strip()
         if q:
             year, week = q.split("-")
-            week_title = f"Week {int(year)}-{int(week):02d}"
+            week_title = _week_title_cached(int(year), int(week))
         else:
             week_title = _week_title(datetime.now(TZ))
-        ok, err = update_weekly_totals_for_week(week_title)
+        result = _rebuild_now(week_title)
+        if result is None:
+            return {"ok": True, "week_title": week_title, "queued": True}, 202
+        ok, err = result
         if ok:
             return {"ok": True, "week_title": week_title}, 200
         return {"ok": False, "week_title": week_title, "error": err}, 500
@@ -403,48 +1044,48 @@ def admin():
     msg = None
     if flask_request.method == "POST":
         if flask_request.form.get("action") == "rebuild":
-            ok, err = update_weekly_totals_for_week(_week_title(datetime.now(TZ)))
-            msg = "Rebuilt totals." if ok else f"Rebuild failed: {err}"
+            result = _rebuild_now(_week_title(datetime.now(TZ)))
+            if result is None:
+                msg = "Rebuild queued; totals will update shortly."
+            else:
+                ok, err = result
+                msg = "Rebuilt totals." if ok else f"Rebuild failed: {err}"
 
-    # Gather data for dashboard
-    # 1) This Week Totals
+    # Gather data for dashboard: both sheet ranges in one batchGet
     sheet_id = os.getenv("SHEET_ID", "").strip()
-    totals = []
-    updated_at = ""
     week_title = _week_title(datetime.now(TZ))
+    totals_vals = summary_vals = []
     try:
-        gc = _get_gs_client()
-        sh = gc.open_by_key(sheet_id)
+        sh = _get_sheet(sheet_id)
         totals_ws = _get_or_create_totals_ws(sh, week_title)
-        vals = totals_ws.get_all_values()
-        if vals and len(vals) > 1:
-            header = vals[0]
-            for row in vals[1:]:
-                if not row: continue
-                if row[0] == "__WEEK_TOTAL__":
-                    updated_at = row[2] if len(row) > 2 else ""
-                    continue
-                crew = row[0]
-                hours = row[1] if len(row) > 1 else ""
-                ua = row[2] if len(row) > 2 else ""
-                totals.append((crew, hours))
-                updated_at = ua or updated_at
+        all_ws = _get_or_create_all_weeks_ws(sh)
+        res = _with_backoff(sh.values_batch_get,
+                            [f"'{totals_ws.title}'!A:C", f"'{all_ws.title}'!A:D"])
+        totals_vals, summary_vals = (vr.get("values", []) for vr in res["valueRanges"])
     except Exception as e:
         msg = msg or f"Sheets read failed: {e}"
 
+    # 1) This Week Totals
+    totals = []
+    updated_at = ""
+    for row in totals_vals[1:]:
+        if not row: continue
+        if row[0] == "__WEEK_TOTAL__":
+            updated_at = row[2] if len(row) > 2 else ""
+            continue
+        crew = row[0]
+        hours = row[1] if len(row) > 1 else ""
+        ua = row[2] if len(row) > 2 else ""
+        totals.append((crew, hours))
+        updated_at = ua or updated_at
+
     # 2) Summary tail
     summary_tail = []
-    try:
-        sh = gc.open_by_key(sheet_id)
-        all_ws = _get_or_create_all_weeks_ws(sh)
-        vals = all_ws.get_all_values()
-        if vals and len(vals) > 1:
-            tail = vals[-10:]
-            for r in tail[1:] if tail[0][0].lower() == "week_title" else tail:
-                if len(r) >= 4:
-                    summary_tail.append((r[0], r[1], r[2], r[3]))
-    except Exception:
-        pass
+    if len(summary_vals) > 1:
+        tail = summary_vals[-10:]
+        for r in tail[1:] if tail[0] and tail[0][0].lower() == "week_title" else tail:
+            if len(r) >= 4:
+                summary_tail.append((r[0], r[1], r[2], r[3]))
 
     # 3) Recent punches
     punches = get_recent_entries(limit=50)
@@ -462,5 +1103,6 @@ def admin():
 # ------------------------------------------------------------------
 # Run
 # ------------------------------------------------------------------
+# Local development only; production runs under gunicorn (see Procfile).
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=int(os.getenv("PORT", 5000)), debug=True)
+    app.run(host="0.0.0.0", port=int(os.getenv("PORT", 5000)), debug=os.getenv("FLASK_DEBUG") == "1")
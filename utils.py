@@ -1,12 +1,19 @@
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from collections import defaultdict
+from functools import lru_cache
+from operator import attrgetter
 
 def to_local(dt_utc, tzname="America/New_York"):
     if dt_utc is None:
         return None
     return dt_utc.astimezone(ZoneInfo(tzname))
 
+@lru_cache(maxsize=4096)
+def _week_key(day):
+    iso = day.isocalendar()
+    return f"{iso[0]}-W{iso[1]:02d}"
+
 def weekly_buckets(rows, tzname="America/New_York"):
     """Pairs clock_in/out entries and totals hours per week per person."""
     by_person = defaultdict(list)
@@ -15,26 +22,17 @@ def weekly_buckets(rows, tzname="America/New_York"):
 
     report = {}
     for name, logs in by_person.items():
-        logs.sort(key=lambda r: r.ts)
+        logs.sort(key=attrgetter("ts"))
         total = defaultdict(float)
-        i = 0
-        while i < len(logs):
-            if logs[i].action != "clock_in":
-                i += 1
-                continue
-            start = logs[i].ts
-            end = None
-            j = i + 1
-            while j < len(logs):
-                if logs[j].action == "clock_out":
-                    end = logs[j].ts
-                    break
-                j += 1
-            if end:
-                wk = f"{start.isocalendar().year}-W{start.isocalendar().week:02d}"
-                total[wk] += (end - start).total_seconds() / 3600
-                i = j + 1
-            else:
-                i += 1
+        # An IN opens a shift and the next OUT closes it; repeat INs while a
+        # shift is open and OUTs with none open are ignored.
+        start = None
+        for log in logs:
+            if log.action == "clock_in":
+                if start is None:
+                    start = log.ts
+            elif log.action == "clock_out" and start is not None:
+                total[_week_key(start.date())] += (log.ts - start).total_seconds() / 3600
+                start = None
         report[name] = {wk: round(h, 2) for wk, h in total.items()}
     return report